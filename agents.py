@@ -1,11 +1,19 @@
 import os
+import json
+import asyncio
+import threading
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from typing import TypedDict, List
+from typing import Annotated, TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
+from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from tools import triage_tools, logistics_tools, medical_tools
+from router_cache import RouterCache
+from supervisor_rules import classify_by_rules
 
 # Load environment variables
 load_dotenv()
@@ -14,58 +22,269 @@ load_dotenv()
 # FIX: Changed to valid Gemini model
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.3)
 
+# Routing only emits one agent name: use a lighter, deterministic model
+supervisor_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0.0, max_output_tokens=8)
+
+# History summaries are short side-calls: same light model, capped output
+summary_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0.0, max_output_tokens=120)
+
+# Cap on in-flight Gemini calls across all sessions, to stay within the rate limit
+MAX_CONCURRENT_LLM_CALLS = 4
+
+# Semantic cache of Supervisor decisions (Redis if REDIS_URL is set)
+embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+router_cache = RouterCache(redis_url=os.environ.get("REDIS_URL"))
+
+AGENT_NAMES = ["Triage", "Logistics", "Medical", "FINISH"]
+
+# The Supervisor only needs the tail of the conversation to route
+ROUTER_HISTORY_MESSAGES = 4
+
+# When the Supervisor's answer is unusable, ask all specialists in one call
+# instead of guessing Triage
+BATCH_SPECIALISTS = os.environ.get("BATCH_SPECIALISTS", "false").lower() in ("1", "true", "yes")
+
 # --- State Definition ---
 class AgentState(TypedDict):
-    messages: List[BaseMessage]
+    # Appended to, so a returning agent sees its tool call and the result
+    messages: Annotated[List[BaseMessage], add_messages]
     next_agent: str
+    triage_draft: Optional[BaseMessage]
+    last_agent: str
+
+# --- Specialist Contexts ---
+TRIAGE_CONTEXT = """You are an intelligent Triage Officer for ResQ-Link.
+    
+    YOUR PRIORITIES:
+    1. **Safety First:** If the user is hurt (e.g., "dog bite", "cut", "trapped"), IMMEDIATELY give brief life-saving advice.
+    2. **Data Collection:** To send help, you MUST log the incident using the 'log_incident' tool.
+    
+    HOW TO BEHAVE:
+    - If the user report is incomplete, give safety advice FIRST, then ask for the missing details.
+    - The 'log_incident' tool requires 3 things: 
+      (1) Severity (Critical/Moderate/Minor)
+      (2) Location
+      (3) Needs (Medical/Rescue)
+    
+    Be concise and professional."""
+
+LOGISTICS_CONTEXT = """You are the Logistics Coordinator. 
+    Your job is to check inventory or find shelters.
+    Always be concise. If the database is empty, suggest searching online.
+    Be professional and helpful."""
+
+MEDICAL_CONTEXT = """You are a Medical AI Assistant. 
+    Provide clear, step-by-step first aid or medical advice.
+    Keep it concise and authoritative.
+    Always remind users to seek professional medical help for serious conditions."""
+
+COMBINED_CONTEXT = f"""You are the ResQ-Link specialist team. Answer the conversation once as each specialist.
+
+    TRIAGE:
+    {TRIAGE_CONTEXT}
+
+    LOGISTICS:
+    {LOGISTICS_CONTEXT}
+
+    MEDICAL:
+    {MEDICAL_CONTEXT}
+
+    No tools are available in this mode; ask for details instead of logging.
+    Reply with ONLY a JSON object with these keys:
+    "route": the specialist best suited to this message (Triage, Logistics or Medical),
+    "Triage", "Logistics", "Medical": each specialist's answer."""
+
+# --- Specialist Prompts ---
+# Built once at import. The system text stays a fixed prefix ahead of the
+# history, so Gemini's implicit context caching can reuse it across calls.
+def _specialist_prompt(system_context: str) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=system_context),
+        MessagesPlaceholder("history"),
+    ])
+
+TRIAGE_PROMPT = _specialist_prompt(TRIAGE_CONTEXT)
+LOGISTICS_PROMPT = _specialist_prompt(LOGISTICS_CONTEXT)
+MEDICAL_PROMPT = _specialist_prompt(MEDICAL_CONTEXT)
+COMBINED_PROMPT = _specialist_prompt(COMBINED_CONTEXT)
+
+# Tagged so the UI streams their tokens wherever they run, including the
+# speculative Triage draft inside the Supervisor. Combined replies in JSON,
+# so it is left untagged.
+SPECIALIST_TAG = "specialist"
+
+triage_chain = (TRIAGE_PROMPT | llm.bind_tools(triage_tools)).with_config(tags=[SPECIALIST_TAG])
+logistics_chain = (LOGISTICS_PROMPT | llm.bind_tools(logistics_tools)).with_config(tags=[SPECIALIST_TAG])
+medical_chain = (MEDICAL_PROMPT | llm).with_config(tags=[SPECIALIST_TAG])
+combined_chain = COMBINED_PROMPT | llm
 
 # --- Helper Function ---
 def normalize_message_content(message):
-    """Ensures message content is always a string."""
-    if not hasattr(message, 'content'):
-        return message
+    """Ensures message content is always a string.
+
+    Normalization rewrites list content to a str in place, so every later
+    call on the same message (Supervisor, then a specialist) takes the str
+    fast path and returns immediately.
+    """
+    content = getattr(message, 'content', None)
     
-    content = message.content
+    # Fast path: plain or already-normalized string content.
+    # Exact class checks skip isinstance's subclass machinery.
+    if content.__class__ is str:
+        return message
     
     # If content is a list, extract text parts
-    if isinstance(content, list):
-        text_parts = []
-        for part in content:
-            if isinstance(part, str):
-                text_parts.append(part)
-            elif isinstance(part, dict) and 'text' in part:
-                text_parts.append(part['text'])
-            else:
-                text_parts.append(str(part))
-        message.content = ' '.join(text_parts).strip()
+    if content.__class__ is list:
+        message.content = ' '.join([
+            part if part.__class__ is str
+            else part['text'] if part.__class__ is dict and 'text' in part
+            else str(part)
+            for part in content
+        ]).strip()
     
     return message
 
 
-def _ensure_human_message(msgs: List[BaseMessage]) -> List[BaseMessage]:
-    """Return messages guaranteed to include at least one HumanMessage.
+# Only ever sent to the LLM, never stored in state, so one instance is shared
+_FALLBACK_HUMAN = HumanMessage(content="Hello, I need assistance.")
+
+def _ensure_human_message(msgs: List[BaseMessage], has_human: bool):
+    """Guarantee `msgs` includes at least one HumanMessage, in place.
 
     Some LLM backends (Gemini) require at least one non-system message. If none
     exists, append a harmless fallback HumanMessage.
     """
-    if any(isinstance(m, HumanMessage) for m in msgs):
-        return msgs
-    return msgs + [HumanMessage(content="Hello, I need assistance.")]
+    if not has_human:
+        msgs.append(_FALLBACK_HUMAN)
+
+
+# One limiter for the whole process. Every Streamlit session and turn runs
+# its own event loop, so an asyncio.Semaphore cannot be shared between them.
+_LLM_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_LLM_CALLS)
+LLM_SLOT_POLL_SECONDS = 0.05
+
+@asynccontextmanager
+async def _llm_slot():
+    """Hold one of the process-wide LLM call slots.
+
+    Polls instead of blocking a worker thread, so a cancelled waiter never
+    ends up owning a slot it cannot release.
+    """
+    while not _LLM_SLOTS.acquire(blocking=False):
+        await asyncio.sleep(LLM_SLOT_POLL_SECONDS)
+    try:
+        yield
+    finally:
+        _LLM_SLOTS.release()
+
+
+async def _ainvoke(runnable, payload):
+    """Invoke an LLM runnable asynchronously, respecting the concurrency cap."""
+    async with _llm_slot():
+        return await runnable.ainvoke(payload)
+
+
+# Keep references so fire-and-forget tasks are not garbage collected mid-flight
+_background_tasks = set()
+
+def _run_in_background(coro):
+    """Schedule a coroutine without awaiting it."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _router_line(msg: BaseMessage) -> str:
+    """Render one message as a line of the Supervisor's history."""
+    if isinstance(msg, HumanMessage):
+        return f"User: {msg.content}\n"
+    if isinstance(msg, AIMessage):
+        return f"AI: {msg.content}\n"
+    return ""
+
+
+def _prepare_msgs(state: AgentState, fallback: str) -> List[BaseMessage]:
+    """Build the history a specialist prompt is filled with.
+
+    Walks the history once: normalizes content (a no-op for messages
+    already normalized earlier in the turn), drops SystemMessages (the
+    prompt template supplies the only one) and falls back to `fallback`
+    when nothing is left.
+    """
+    non_system_msgs = []
+    has_human = False
+    for msg in state.get('messages', []):
+        msg = normalize_message_content(msg)
+        if type(msg) is not SystemMessage:
+            non_system_msgs.append(msg)
+            has_human = has_human or isinstance(msg, HumanMessage)
+
+    # Ensure we have at least one non-system message
+    if not non_system_msgs:
+        non_system_msgs.append(HumanMessage(content=fallback))
+        has_human = True
+
+    _ensure_human_message(non_system_msgs, has_human)
+    return non_system_msgs
+
+
+def _last_user_text(history: List[BaseMessage]) -> str:
+    """Return the latest message's text if it came from the user, else ''."""
+    if not history or not isinstance(history[-1], HumanMessage):
+        return ""
+    return normalize_message_content(history[-1]).content
+
+
+def _rule_route(history: List[BaseMessage]) -> Optional[str]:
+    """Keyword-route the latest user message when it stands on its own.
+
+    A reply to an agent's question ("Severity critical, location Sector 4
+    shelter") only makes sense with that question, so it goes to the LLM.
+    """
+    user_text = _last_user_text(history)
+    if not user_text:
+        return None
+    previous = history[-2] if len(history) > 1 else None
+    if isinstance(previous, AIMessage) and "?" in normalize_message_content(previous).content:
+        return None
+    return classify_by_rules(user_text)
+
+
+async def _cached_route(history_text: str):
+    """Look up the router's history window in the router cache.
+
+    Returns (agent, embedding); agent is None on a miss, and embedding is None
+    when the lookup failed.
+
+    Entries are keyed on the same window the router LLM reads, so a reply
+    like "yes" or "Sector 4" is matched together with the question it answers.
+    """
+    try:
+        async with _llm_slot():
+            embedding = await embeddings.aembed_query(history_text)
+        return await router_cache.get_async(embedding), embedding
+    except Exception as e:
+        print(f"Router cache error: {e}")
+        return None, None
+
+
+async def _ask_router(prompt: str) -> str:
+    """Return the router LLM's answer, or '' if the call failed."""
+    try:
+        response = await _ainvoke(supervisor_llm, prompt)
+        return response.content.strip().replace("'", "").replace(".", "")
+    except Exception as e:
+        print(f"Supervisor error: {e}")
+        return ""
 
 # --- Node Definitions ---
 
-def supervisor_node(state: AgentState):
-    """The Router. Decides which specialist handles the next step."""
+async def _route(state: AgentState) -> str:
+    """Ask the LLM which specialist should handle the next step."""
     history = state.get('messages', [])
     
-    # Convert history to text for the router
-    history_text = ""
-    for msg in history:
-        msg = normalize_message_content(msg)
-        if isinstance(msg, HumanMessage):
-            history_text += f"User: {msg.content}\n"
-        elif isinstance(msg, AIMessage):
-            history_text += f"AI: {msg.content}\n"
+    # Convert recent history to text for the router
+    history_text = "".join(_router_line(normalize_message_content(msg)) for msg in history[-ROUTER_HISTORY_MESSAGES:])
             
     if not history_text:
         history_text = "User: Hello."
@@ -85,133 +304,115 @@ def supervisor_node(state: AgentState):
     Output ONLY the next agent name.
     """
     
-    try:
-        response = llm.invoke(prompt)
-        next_agent = response.content.strip().replace("'", "").replace(".", "")
-    except Exception as e:
-        print(f"Supervisor error: {e}")
-        next_agent = "Triage"
+    # Start the router call right away; a cache hit only saves its latency
+    # if the two round-trips overlap.
+    router_task = asyncio.create_task(_ask_router(prompt))
+    cached_agent, embedding = await _cached_route(history_text)
+    if cached_agent:
+        router_task.cancel()
+        return cached_agent
 
-    if next_agent not in ["Triage", "Logistics", "Medical", "FINISH"]:
-        next_agent = "Triage"
+    next_agent = await router_task
+    if not next_agent:
+        return "Triage"
+
+    if next_agent not in AGENT_NAMES:
+        # Uncertain router: let one batched call answer for every specialist
+        return "Combined" if BATCH_SPECIALISTS else "Triage"
+
+    if embedding is not None:
+        _run_in_background(router_cache.put_async(embedding, next_agent))
         
-    return {"next_agent": next_agent}
+    return next_agent
+
+async def supervisor_node(state: AgentState):
+    """The Router. Decides which specialist handles the next step.
 
-def triage_node(state: AgentState):
+    Clear-cut messages are routed by keyword rules with no LLM call.
+    Otherwise Triage, the common route, is answered speculatively while the
+    routing call runs, and the draft is kept only if the router agrees.
+    """
+    rule_agent = _rule_route(state.get('messages', []))
+    if rule_agent:
+        return {"next_agent": rule_agent, "triage_draft": None}
+
+    draft_task = asyncio.create_task(_run_triage(state))
+    next_agent = await _route(state)
+    if next_agent != "Triage":
+        draft_task.cancel()
+        return {"next_agent": next_agent, "triage_draft": None}
+    return {"next_agent": next_agent, "triage_draft": await draft_task}
+
+async def _run_triage(state: AgentState) -> BaseMessage:
     """
     Intelligent Triage with Crash Prevention.
     """
-    # 1. Get messages from state
-    msgs = state.get('messages', [])
-    
-    # --- SAFETY NET: FIX THE CRASH ---
-    if not msgs:
-        msgs = [HumanMessage(content="User reported an incident. Please ask for details.")]
-    
-    # Normalize all messages
-    msgs = [normalize_message_content(msg) for msg in msgs]
-    
-    # Filter out SystemMessages to avoid Gemini API error
-    non_system_msgs = [msg for msg in msgs if not isinstance(msg, SystemMessage)]
-    
-    # Ensure we have at least one non-system message
-    if not non_system_msgs:
-        non_system_msgs = [HumanMessage(content="User needs assistance. Please respond.")]
-
-    # 2. Bind tools
-    tools_llm = llm.bind_tools(triage_tools)
-    
-    # 3. Create system context as first user message instead of SystemMessage
-    system_context = """You are an intelligent Triage Officer for ResQ-Link.
-    
-    YOUR PRIORITIES:
-    1. **Safety First:** If the user is hurt (e.g., "dog bite", "cut", "trapped"), IMMEDIATELY give brief life-saving advice.
-    2. **Data Collection:** To send help, you MUST log the incident using the 'log_incident' tool.
-    
-    HOW TO BEHAVE:
-    - If the user report is incomplete, give safety advice FIRST, then ask for the missing details.
-    - The 'log_incident' tool requires 3 things: 
-      (1) Severity (Critical/Moderate/Minor)
-      (2) Location
-      (3) Needs (Medical/Rescue)
-    
-    Be concise and professional."""
-    
-    # Prepend system context to first message if it's from user
-    if non_system_msgs and isinstance(non_system_msgs[0], HumanMessage):
-        non_system_msgs[0].content = f"[System Context: {system_context}]\n\nUser: {non_system_msgs[0].content}"
+    # 1. Prepare messages (--- SAFETY NET: FIX THE CRASH ---)
+    history = _prepare_msgs(state, "User reported an incident. Please ask for details.")
     
-    # 4. Invoke LLM
+    # 2. Invoke LLM (tools are bound in triage_chain)
     try:
-        msgs_to_send = _ensure_human_message(non_system_msgs)
-        response = tools_llm.invoke(msgs_to_send)
+        response = await _ainvoke(triage_chain, {"history": history})
         response = normalize_message_content(response)
     except Exception as e:
         print(f"Triage error: {e}")
         response = AIMessage(content=f"⚠️ Triage system encountered an error. Please try rephrasing your request.")
     
-    return {"messages": [response]}
+    return response
+
+async def triage_node(state: AgentState):
+    """Responds as Triage, reusing the Supervisor's speculative draft if present."""
+    response = state.get('triage_draft')
+    if response is None:
+        response = await _run_triage(state)
+    return {"messages": [response], "triage_draft": None, "last_agent": "Triage"}
 
-def logistics_node(state: AgentState):
+async def logistics_node(state: AgentState):
     """Finds resources."""
-    tools_llm = llm.bind_tools(logistics_tools)
-    msgs = state.get('messages', [])
-    
-    # Normalize messages
-    msgs = [normalize_message_content(msg) for msg in msgs]
-    
-    # Filter out SystemMessages
-    non_system_msgs = [msg for msg in msgs if not isinstance(msg, SystemMessage)]
-    
-    # Ensure we have at least one message
-    if not non_system_msgs:
-        non_system_msgs = [HumanMessage(content="User needs logistics assistance.")]
-    
-    # Add system context to first user message
-    system_context = """You are the Logistics Coordinator. 
-    Your job is to check inventory or find shelters.
-    Always be concise. If the database is empty, suggest searching online.
-    Be professional and helpful."""
-    
-    if non_system_msgs and isinstance(non_system_msgs[0], HumanMessage):
-        non_system_msgs[0].content = f"[System Context: {system_context}]\n\nUser: {non_system_msgs[0].content}"
+    history = _prepare_msgs(state, "User needs logistics assistance.")
     
     try:
-        msgs_to_send = _ensure_human_message(non_system_msgs)
-        response = tools_llm.invoke(msgs_to_send)
+        response = await _ainvoke(logistics_chain, {"history": history})
         response = normalize_message_content(response)
     except Exception as e:
         print(f"Logistics error: {e}")
         response = AIMessage(content=f"⚠️ Logistics system encountered an error. Please try again.")
     
-    return {"messages": [response]}
+    return {"messages": [response], "last_agent": "Logistics"}
 
-def medical_node(state: AgentState):
-    """Provides general medical advice."""
-    msgs = state.get('messages', [])
-    
-    # Normalize messages
-    msgs = [normalize_message_content(msg) for msg in msgs]
-    
-    # Filter out SystemMessages
-    non_system_msgs = [msg for msg in msgs if not isinstance(msg, SystemMessage)]
-    
-    # Ensure we have at least one message
-    if not non_system_msgs:
-        non_system_msgs = [HumanMessage(content="User needs medical advice.")]
+def _parse_combined_answer(text: str) -> str:
+    """Pick the routed specialist's answer out of the combined JSON reply."""
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        answers = json.loads(text[start:end + 1])
+    except ValueError:
+        return text
+    if not isinstance(answers, dict):
+        return text
+    route = answers.get("route")
+    answer = (answers.get(route) if isinstance(route, str) else None) or answers.get("Triage")
+    return answer if isinstance(answer, str) and answer else text
+
+async def combined_specialist_node(state: AgentState):
+    """Answers as Triage, Logistics and Medical in a single LLM call."""
+    history = _prepare_msgs(state, "User needs assistance. Please respond.")
     
-    # Add system context to first user message
-    system_context = """You are a Medical AI Assistant. 
-    Provide clear, step-by-step first aid or medical advice.
-    Keep it concise and authoritative.
-    Always remind users to seek professional medical help for serious conditions."""
+    try:
+        response = await _ainvoke(combined_chain, {"history": history})
+        response = normalize_message_content(response)
+        response = AIMessage(content=_parse_combined_answer(response.content))
+    except Exception as e:
+        print(f"Combined specialist error: {e}")
+        response = AIMessage(content="⚠️ ResQ-Link encountered an error. Please try rephrasing your request.")
     
-    if non_system_msgs and isinstance(non_system_msgs[0], HumanMessage):
-        non_system_msgs[0].content = f"[System Context: {system_context}]\n\nUser: {non_system_msgs[0].content}"
+    return {"messages": [response]}
+
+async def medical_node(state: AgentState):
+    """Provides general medical advice."""
+    history = _prepare_msgs(state, "User needs medical advice.")
     
     try:
-        msgs_to_send = _ensure_human_message(non_system_msgs)
-        response = llm.invoke(msgs_to_send)
+        response = await _ainvoke(medical_chain, {"history": history})
         response = normalize_message_content(response)
     except Exception as e:
         print(f"Medical error: {e}")
@@ -219,6 +420,54 @@ def medical_node(state: AgentState):
     
     return {"messages": [response]}
 
+# --- History Compaction ---
+# Keeps the agents' context, and so every prompt, bounded in size; the UI
+# transcript is kept separately. The fold always ends at a user turn, so
+# 9 messages (the summary plus 4 turns) are left and the summary call runs
+# at most once every 10 turns.
+HISTORY_COMPACT_THRESHOLD = 28
+HISTORY_COMPACT_BATCH = 21
+HISTORY_MAX_MESSAGES = 30
+
+def _turn_start(messages: List[BaseMessage], index: int) -> int:
+    """Return the first index from `index` on where a user turn begins.
+
+    Falls back to `index` itself when no HumanMessage follows it.
+    """
+    for i in range(index, len(messages)):
+        if isinstance(messages[i], HumanMessage):
+            return i
+    return index
+
+def compact_history(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Fold the oldest messages into a summary once the history grows long.
+
+    Above HISTORY_COMPACT_THRESHOLD messages, at least the oldest
+    HISTORY_COMPACT_BATCH, up to the next user turn, are replaced by one
+    "[Summary]" AIMessage from the light summary_llm, so no question is
+    split from its answer. The result never exceeds HISTORY_MAX_MESSAGES,
+    even if summarizing fails.
+    """
+    if len(messages) > HISTORY_COMPACT_THRESHOLD:
+        cut = _turn_start(messages, HISTORY_COMPACT_BATCH)
+        oldest = messages[:cut]
+        transcript = "".join(_router_line(normalize_message_content(msg)) for msg in oldest)
+        prompt = f"""Summarize this emergency-response conversation in under 80 tokens.
+    Keep locations, injuries, incident IDs and any open requests.
+
+    {transcript}"""
+        try:
+            # Runs outside any event loop, so wait on the shared limiter directly
+            with _LLM_SLOTS:
+                summary = normalize_message_content(summary_llm.invoke(prompt)).content
+            messages = [AIMessage(content=f"[Summary] {summary}")] + messages[cut:]
+        except Exception as e:
+            print(f"Summary error: {e}")
+    
+    if len(messages) > HISTORY_MAX_MESSAGES:
+        messages = messages[_turn_start(messages, len(messages) - HISTORY_MAX_MESSAGES):]
+    return messages
+
 # --- Tool Node ---
 tool_node = ToolNode(triage_tools + logistics_tools)
 
@@ -229,6 +478,7 @@ workflow.add_node("Supervisor", supervisor_node)
 workflow.add_node("Triage", triage_node)
 workflow.add_node("Logistics", logistics_node)
 workflow.add_node("Medical", medical_node)
+workflow.add_node("Combined", combined_specialist_node)
 workflow.add_node("Tools", tool_node)
 
 workflow.set_entry_point("Supervisor")
@@ -236,7 +486,7 @@ workflow.set_entry_point("Supervisor")
 workflow.add_conditional_edges(
     "Supervisor",
     lambda x: x['next_agent'],
-    {"Triage": "Triage", "Logistics": "Logistics", "Medical": "Medical", "FINISH": END}
+    {"Triage": "Triage", "Logistics": "Logistics", "Medical": "Medical", "Combined": "Combined", "FINISH": END}
 )
 
 def should_continue(state: AgentState):
@@ -250,6 +500,12 @@ def should_continue(state: AgentState):
 workflow.add_conditional_edges("Triage", should_continue, {"Tools": "Tools", "END": END})
 workflow.add_conditional_edges("Logistics", should_continue, {"Tools": "Tools", "END": END})
 workflow.add_edge("Medical", END)
-workflow.add_edge("Tools", "Supervisor") # Loop back to supervisor to confirm action
+workflow.add_edge("Combined", END)
+# Tool results go straight back to the agent that requested them
+workflow.add_conditional_edges(
+    "Tools",
+    lambda x: x.get('last_agent', "Triage"),
+    {"Triage": "Triage", "Logistics": "Logistics"}
+)
 
 app_graph = workflow.compile()
\ No newline at end of file
@@ -1,5 +1,6 @@
+import asyncio
 import streamlit as st
-from agents import app_graph
+from agents import app_graph, compact_history, SPECIALIST_TAG
 from langchain_core.messages import HumanMessage, AIMessage
 import os
 from dotenv import load_dotenv
@@ -22,153 +23,15 @@ st.set_page_config(
 )
 
 # --- 2. CSS STYLING (The Magic Section) ---
-st.markdown("""
-<style>
-    /* Import Google Font */
-    @import url('https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600&display=swap');
-    
-    /* GLOBAL THEME */
-    .stApp {
-        background-color: #0E0E0E;
-        font-family: 'Outfit', sans-serif;
-        color: #ffffff;
-    }
-    
-    /* --- ANIMATION DEFINITIONS --- */
-    @keyframes gemini-line-flow {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
-    
-    @keyframes gemini-flow {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
+# Stylesheet lives in static/app.css; read once per process, not per rerun
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "app.css")
 
-    /* --- INPUT BOX STYLING --- */
-    div[data-testid="stChatInput"] {
-        background-color: transparent !important;
-    }
-    
-    div[data-testid="stChatInput"] > div {
-        background-color: #1e1f20 !important; 
-        border: 1px solid #333; 
-        border-radius: 24px !important; 
-        color: #fff !important;
-        position: relative;
-        overflow: hidden;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.3);
-    }
-    
-    div[data-testid="stChatInput"] > div::after {
-        content: "";
-        position: absolute;
-        bottom: 0;
-        left: 0;
-        width: 100%;
-        height: 3px;
-        background: linear-gradient(90deg, #4285F4, #DB4437, #F4B400, #0F9D58);
-        background-size: 200% 200%;
-        animation: gemini-line-flow 4s linear infinite;
-        opacity: 0.9;
-    }
-    
-    textarea[data-testid="stChatInputTextArea"] {
-        color: #ffffff !important;
-        caret-color: #4285F4;
-    }
+@st.cache_data
+def load_css(path=CSS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
 
-    /* --- CHAT BUBBLES --- */
-    .chat-container {
-        display: flex;
-        flex-direction: column;
-        gap: 20px;
-        padding-bottom: 50px;
-    }
-    
-    .user-message {
-        align-self: flex-end;
-        background: linear-gradient(270deg, #1c4b96, #4285F4, #8ab4f8);
-        background-size: 200% 200%;
-        animation: gemini-flow 6s ease infinite;
-        color: white;
-        padding: 14px 20px;
-        border-radius: 24px 24px 4px 24px;
-        max-width: 70%;
-        text-align: right;
-        margin-left: auto;
-        box-shadow: 0 4px 15px rgba(66, 133, 244, 0.2);
-        display: block;
-        width: fit-content;
-    }
-    
-    .agent-message {
-        align-self: flex-start;
-        position: relative;
-        background: #1e1f20;
-        color: #e3e3e3;
-        padding: 14px 20px;
-        border-radius: 24px 24px 24px 4px;
-        max-width: 75%;
-        text-align: left;
-        margin-right: auto;
-        display: block;
-        width: fit-content;
-        border: 2px solid transparent;
-        background-clip: padding-box;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.3);
-    }
-    
-    .agent-message::before {
-        content: "";
-        position: absolute;
-        top: -2px; bottom: -2px; left: -2px; right: -2px;
-        z-index: -1;
-        border-radius: 26px 26px 26px 6px;
-        background: linear-gradient(45deg, #4285F4, #DB4437, #F4B400, #0F9D58);
-        background-size: 300% 300%;
-        animation: gemini-line-flow 4s linear infinite;
-    }
-
-    /* --- DASHBOARD CARDS --- */
-    .dashboard-card {
-        background: #1e1f20;
-        padding: 15px;
-        border-radius: 12px;
-        border: 1px solid #333;
-        text-align: center;
-        transition: all 0.3s ease;
-    }
-    .dashboard-card:hover {
-        border-color: #4285F4;
-        transform: translateY(-2px);
-    }
-    .card-label {
-        font-size: 12px;
-        color: #9aa0a6;
-        letter-spacing: 1px;
-        margin-bottom: 5px;
-        text-transform: uppercase;
-    }
-    .card-value {
-        font-size: 22px;
-        font-weight: 600;
-        background: -webkit-linear-gradient(0deg, #4285F4, #9b72cb);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-    }
-    
-    /* Sidebar & Footer Cleanup */
-    section[data-testid="stSidebar"] {
-        background-color: #1e1f20;
-        border-right: 1px solid #111;
-    }
-    .stDeployButton {display:none;}
-    footer {visibility: hidden;}
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # --- 3. SIDEBAR ---
 with st.sidebar:
@@ -195,6 +58,7 @@ with st.sidebar:
     st.divider()
     if st.button("🔄 Reboot System", use_container_width=True):
         st.session_state.messages = []
+        st.session_state.context = []
         st.rerun()
 
 # --- 4. MAIN HEADER ---
@@ -247,21 +111,32 @@ st.write("")
 # --- 6. HELPER FUNCTION ---
 def extract_text_content(content):
     """Safely extract text from AIMessage content (handles list or string)."""
-    if isinstance(content, str):
+    # Fast path: plain string content is the common case
+    if content.__class__ is str:
         return content
-    elif isinstance(content, list):
-        text_parts = []
-        for part in content:
-            if isinstance(part, str):
-                text_parts.append(part)
-            elif isinstance(part, dict) and "text" in part:
-                text_parts.append(part["text"])
-        return " ".join(text_parts)
+    elif content.__class__ is list:
+        return " ".join([
+            part if part.__class__ is str else part["text"]
+            for part in content
+            if part.__class__ is str or (part.__class__ is dict and "text" in part)
+        ])
     return str(content)
 
+def colorize_agent_names(content):
+    """Highlight bold agent names in each agent's color."""
+    content = content.replace("**Triage**", "<strong style='color:#DB4437'>Triage</strong>")
+    content = content.replace("**Logistics**", "<strong style='color:#F4B400'>Logistics</strong>")
+    content = content.replace("**Medical**", "<strong style='color:#4285F4'>Medical</strong>")
+    content = content.replace("**Supervisor**", "<strong style='color:#4285F4'>Supervisor</strong>")
+    return content
+
 # --- 7. CHAT DISPLAY ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# What the agents see: the same turns, but compacted as the chat grows,
+# while `messages` keeps the full transcript for display
+if "context" not in st.session_state:
+    st.session_state.context = []
 
 chat_placeholder = st.container()
 
@@ -273,13 +148,8 @@ with chat_placeholder:
                 unsafe_allow_html=True
             )
         elif isinstance(msg, AIMessage):
-            content = extract_text_content(msg.content)
-            
             # Colorize agent names
-            content = content.replace("**Triage**", "<strong style='color:#DB4437'>Triage</strong>")
-            content = content.replace("**Logistics**", "<strong style='color:#F4B400'>Logistics</strong>")
-            content = content.replace("**Medical**", "<strong style='color:#4285F4'>Medical</strong>")
-            content = content.replace("**Supervisor**", "<strong style='color:#4285F4'>Supervisor</strong>")
+            content = colorize_agent_names(extract_text_content(msg.content))
             
             st.markdown(
                 f'<div class="agent-message">{content}</div>',
@@ -291,7 +161,9 @@ user_input = st.chat_input("ResQ-Link is waiting for your message...")
 
 if user_input:
     # Append user message
-    st.session_state.messages.append(HumanMessage(content=user_input))
+    user_message = HumanMessage(content=user_input)
+    st.session_state.messages.append(user_message)
+    st.session_state.context.append(user_message)
     
     # Display user message
     with chat_placeholder:
@@ -300,42 +172,82 @@ if user_input:
             unsafe_allow_html=True
         )
 
+    # Placeholder the agent's reply is streamed into
+    with chat_placeholder:
+        response_placeholder = st.empty()
+
     # Process with AI
-    try:
-        with st.spinner("✨ ResQ-Link is thinking..."):
-            inputs = {"messages": st.session_state.messages}
+    async def run_graph(inputs, max_iterations=10):
+        """Stream graph events, rendering tokens live; return the final response text."""
+        final_response_text = ""
+        streamed_text = ""
+        iteration_count = 0
+        
+        # Stream graph execution
+        async for event in app_graph.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+            streamed = SPECIALIST_TAG in event.get("tags", [])
             
-            final_response_text = ""
-            iteration_count = 0
-            max_iterations = 10
+            # Render specialist tokens as they arrive
+            if kind == "on_chat_model_start" and streamed:
+                streamed_text = ""
+            elif kind == "on_chat_model_stream" and streamed:
+                streamed_text += extract_text_content(event["data"]["chunk"].content)
+                if streamed_text:
+                    response_placeholder.markdown(
+                        f'<div class="agent-message">{streamed_text}</div>',
+                        unsafe_allow_html=True
+                    )
             
-            # Stream graph execution
-            for output in app_graph.stream(inputs):
+            # A graph node finished
+            elif kind == "on_chain_end" and event["name"] == node:
                 iteration_count += 1
                 if iteration_count > max_iterations:
                     st.warning("⚠️ Max iterations reached. Stopping to prevent infinite loop.")
                     break
                 
-                for key, value in output.items():
-                    if key == "Supervisor": 
-                        continue
+                value = event["data"].get("output")
+                if not isinstance(value, dict):
+                    continue
+                
+                if node == "Supervisor":
+                    # Router picked another agent: drop the streamed Triage draft
+                    if value.get("triage_draft") is None and streamed_text:
+                        streamed_text = ""
+                        response_placeholder.empty()
+                    continue
+                
+                if 'messages' in value and value['messages']:
+                    last_msg = value['messages'][-1]
+                    
+                    # Show tool usage notification
+                    if hasattr(last_msg, 'tool_calls') and len(last_msg.tool_calls) > 0:
+                        tool_name = last_msg.tool_calls[0]['name']
+                        st.toast(f"⚡ {node} is running: {tool_name}", icon="🛠️")
                     
-                    if 'messages' in value and value['messages']:
-                        last_msg = value['messages'][-1]
-                        
-                        # Show tool usage notification
-                        if hasattr(last_msg, 'tool_calls') and len(last_msg.tool_calls) > 0:
-                            tool_name = last_msg.tool_calls[0]['name']
-                            st.toast(f"⚡ {key} is running: {tool_name}", icon="🛠️")
-                        
-                        # Capture response text
-                        if hasattr(last_msg, 'content') and last_msg.content:
-                            final_response_text = extract_text_content(last_msg.content)
+                    # Capture response text
+                    if hasattr(last_msg, 'content') and last_msg.content:
+                        final_response_text = extract_text_content(last_msg.content)
+        
+        return final_response_text
+
+    try:
+        with st.spinner("✨ ResQ-Link is thinking..."):
+            inputs = {"messages": st.session_state.context}
+            final_response_text = asyncio.run(run_graph(inputs))
             
-            # Append and display agent response
+            # Append and display agent response in place; the next input
+            # triggers the rerun that redraws the full history
             if final_response_text:
-                st.session_state.messages.append(AIMessage(content=final_response_text))
-                st.rerun()
+                response_placeholder.markdown(
+                    f'<div class="agent-message">{colorize_agent_names(final_response_text)}</div>',
+                    unsafe_allow_html=True
+                )
+                ai_message = AIMessage(content=final_response_text)
+                st.session_state.messages.append(ai_message)
+                st.session_state.context.append(ai_message)
+                st.session_state.context = compact_history(st.session_state.context)
             else:
                 st.warning("⚠️ No response generated. Please try again.")
 
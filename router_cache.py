@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+# Redis is optional; without it the cache lives in process memory
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# --- Config ---
+SIMILARITY_THRESHOLD = 0.85
+CACHE_TTL_SECONDS = 24 * 60 * 60
+MAX_ENTRIES = 1000
+# How often the local mirror is refreshed from Redis
+REDIS_SYNC_SECONDS = 60
+REDIS_KEY = "resq:router:entries"
+
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    """Return the embedding as a unit-length float32 vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RouterCache:
+    """Semantic cache of Supervisor decisions.
+
+    Stores (embedding, agent) pairs and returns the cached agent for any
+    message whose embedding is at least `threshold` cosine-similar to a
+    previously routed one. Lookups always run against a bounded in-memory
+    matrix. When a Redis URL is given and the client is installed, entries
+    are also pushed to a capped Redis list, and the local matrix is
+    refreshed from it every REDIS_SYNC_SECONDS so processes share routes.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None,
+                 threshold: float = SIMILARITY_THRESHOLD,
+                 ttl: int = CACHE_TTL_SECONDS):
+        self.threshold = threshold
+        self.ttl = ttl
+        # The client's connection pool is thread-safe and not tied to an event
+        # loop, so one instance serves every Streamlit session and turn.
+        self._redis = redis.Redis.from_url(redis_url) if redis_url and redis is not None else None
+        self._synced_at = float("-inf")
+        # Streamlit sessions run on separate threads and share this cache
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._agents: List[str] = []
+        self._expires: List[float] = []
+
+    async def get_async(self, embedding: List[float]) -> Optional[str]:
+        """Return the cached agent for a similar message, or None on a miss."""
+        if self._redis is not None and time.monotonic() - self._synced_at > REDIS_SYNC_SECONDS:
+            await asyncio.to_thread(self._sync_from_redis)
+
+        vector = _unit(embedding)
+        with self._lock:
+            self._evict_expired()
+            if self._vectors is None:
+                return None
+            similarities = self._vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return self._agents[best]
+        return None
+
+    async def put_async(self, embedding: List[float], agent: str):
+        """Remember the agent chosen for a message embedding."""
+        vector = _unit(embedding)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._evict_expired()
+            self._append(vector, agent, expires_at)
+
+        if self._redis is not None:
+            entry = json.dumps({"agent": agent, "embedding": vector.tolist(), "expires_at": expires_at})
+            try:
+                await asyncio.to_thread(self._push_to_redis, entry)
+            except Exception as e:
+                print(f"Router cache error: {e}")
+
+    def _append(self, vector: np.ndarray, agent: str, expires_at: float):
+        """Add one entry, dropping the oldest past MAX_ENTRIES. Caller holds the lock."""
+        if len(self._agents) >= MAX_ENTRIES:
+            self._vectors = self._vectors[1:]
+            self._agents.pop(0)
+            self._expires.pop(0)
+        row = vector[np.newaxis, :]
+        self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+        self._agents.append(agent)
+        self._expires.append(expires_at)
+
+    def _evict_expired(self):
+        """Drop entries older than the TTL (oldest come first). Caller holds the lock."""
+        now = time.time()
+        stale = 0
+        while stale < len(self._expires) and self._expires[stale] <= now:
+            stale += 1
+        if stale:
+            self._vectors = self._vectors[stale:] if stale < len(self._agents) else None
+            del self._agents[:stale]
+            del self._expires[:stale]
+
+    def _push_to_redis(self, entry: str):
+        """Prepend an entry to the shared list, capped at MAX_ENTRIES."""
+        pipe = self._redis.pipeline()
+        pipe.lpush(REDIS_KEY, entry)
+        pipe.ltrim(REDIS_KEY, 0, MAX_ENTRIES - 1)
+        pipe.expire(REDIS_KEY, self.ttl)
+        pipe.execute()
+
+    def _sync_from_redis(self):
+        """Replace the local matrix with the live entries stored in Redis."""
+        self._synced_at = time.monotonic()
+        try:
+            values = self._redis.lrange(REDIS_KEY, 0, MAX_ENTRIES - 1)
+        except Exception as e:
+            print(f"Router cache error: {e}")
+            return
+
+        now = time.time()
+        # LPUSH keeps the newest first; the local lists are oldest first
+        entries = [json.loads(value) for value in reversed(values)]
+        entries = [entry for entry in entries if entry["expires_at"] > now]
+        vectors = np.asarray([entry["embedding"] for entry in entries], dtype=np.float32) if entries else None
+        with self._lock:
+            self._vectors = vectors
+            self._agents = [entry["agent"] for entry in entries]
+            self._expires = [entry["expires_at"] for entry in entries]
\ No newline at end of file
@@ -0,0 +1,127 @@
+import re
+import threading
+from typing import Callable, Optional, Set
+
+# Fastest available regex engine: Hyperscan (SIMD), then RE2 (linear-time
+# DFA), then the stdlib. Hyperscan and RE2 are optional.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# --- Keyword Rules ---
+# Mirrors the Supervisor prompt. Only unambiguous phrasings belong here;
+# anything else falls through to the LLM.
+KEYWORD_RULES = {
+    # 1. Emergency / injury -> Triage
+    "dog bite": "Triage",
+    "bitten": "Triage",
+    "bleeding": "Triage",
+    "trapped": "Triage",
+    "stuck under": "Triage",
+    "injured": "Triage",
+    "unconscious": "Triage",
+    "not breathing": "Triage",
+    "collapsed": "Triage",
+    "drowning": "Triage",
+    "on fire": "Triage",
+    "broken bone": "Triage",
+    "broke my": "Triage",
+    # 2. Supplies / shelter -> Logistics
+    "supplies": "Logistics",
+    "shelter": "Logistics",
+    "shelters": "Logistics",
+    "inventory": "Logistics",
+    "water packs": "Logistics",
+    "first aid kits": "Logistics",
+    "blankets": "Logistics",
+    "evacuation center": "Logistics",
+    # 3. General medical knowledge -> Medical
+    "symptoms of": "Medical",
+    "how to treat": "Medical",
+    "how do i treat": "Medical",
+    "what causes": "Medical",
+    "side effects": "Medical",
+    "dosage": "Medical",
+}
+
+# 4. Goodbye / thanks -> FINISH, but only when that is the whole message:
+# "Thanks. We are at 5th and Main, two people hurt" must still get a reply.
+_CLOSING = re.compile(r"^\s*(thanks|thank you|bye|goodbye)\W*$")
+
+
+# Keywords are plain words, so they are used as regex patterns verbatim.
+# Longest first, so alternation prefers "shelters" over "shelter".
+_KEYWORDS = sorted(KEYWORD_RULES, key=len, reverse=True)
+_PATTERNS = [rf"\b{keyword}\b" for keyword in _KEYWORDS]
+
+
+def _hyperscan_matcher() -> Callable[[str], Set[str]]:
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[pattern.encode() for pattern in _PATTERNS],
+        ids=list(range(len(_PATTERNS))),
+        elements=len(_PATTERNS),
+        flags=hyperscan.HS_FLAG_CASELESS,
+    )
+    # Hyperscan scratch space is not thread-safe; Streamlit sessions are threads
+    lock = threading.Lock()
+
+    def match(text: str) -> Set[str]:
+        labels = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            labels.add(KEYWORD_RULES[_KEYWORDS[pattern_id]])
+
+        with lock:
+            database.scan(text.encode(), match_event_handler=on_match)
+        return labels
+
+    return match
+
+
+def _regex_matcher(engine) -> Callable[[str], Set[str]]:
+    regex = engine.compile("|".join(_PATTERNS))
+
+    def match(text: str) -> Set[str]:
+        return {KEYWORD_RULES[found.group(0)] for found in regex.finditer(text)}
+
+    return match
+
+
+# Every available engine, so they can be checked against each other
+_MATCHERS = {"re": _regex_matcher(re)}
+if re2 is not None:
+    _MATCHERS["re2"] = _regex_matcher(re2)
+if hyperscan is not None:
+    _MATCHERS["hyperscan"] = _hyperscan_matcher()
+
+# Each matcher returns the labels of every keyword found in lowercased text
+_match_labels = _MATCHERS.get("hyperscan") or _MATCHERS.get("re2") or _MATCHERS["re"]
+
+
+def classify_by_rules(text: str) -> Optional[str]:
+    """Route a user message by keyword rules.
+
+    Returns 'FINISH' when the whole message is a closing phrase, otherwise
+    the agent name when every matched keyword agrees on one label. Returns
+    None when nothing matches or the labels conflict (e.g. "I'm bleeding,
+    where is the shelter?"), so the caller can fall back to the LLM.
+
+    The text is read without conversation context; callers should skip the
+    rules when the message may be answering an agent's question.
+    """
+    if not text:
+        return None
+    text = text.lower()
+    if _CLOSING.match(text):
+        return "FINISH"
+    labels = _match_labels(text)
+    if len(labels) == 1:
+        return labels.pop()
+    return None
\ No newline at end of file
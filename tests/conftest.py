@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the app modules from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The Gemini clients are built at import time; no test calls the API
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
\ No newline at end of file
@@ -0,0 +1,196 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("langgraph")
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import agents
+from agents import _parse_combined_answer, _rule_route
+
+
+# --- Keyword routing ---
+
+def test_rule_route_uses_rules_for_a_standalone_message():
+    history = [HumanMessage(content="My friend is bleeding")]
+    assert _rule_route(history) == "Triage"
+
+
+def test_rule_route_skips_a_reply_to_a_question():
+    history = [
+        HumanMessage(content="There was an accident"),
+        AIMessage(content="What is the severity and location?"),
+        HumanMessage(content="Severity critical, location Sector 4 shelter"),
+    ]
+    assert _rule_route(history) is None
+
+
+def test_rule_route_reads_a_reply_to_a_statement():
+    history = [
+        HumanMessage(content="There was an accident"),
+        AIMessage(content="Incident #3 logged."),
+        HumanMessage(content="thanks"),
+    ]
+    assert _rule_route(history) == "FINISH"
+
+
+def test_rule_route_ignores_a_trailing_ai_message():
+    history = [HumanMessage(content="bleeding"), AIMessage(content="Apply pressure.")]
+    assert _rule_route(history) is None
+
+
+# --- Router cache ---
+
+class _FakeCache:
+    def __init__(self):
+        self.stored = []
+
+    async def put_async(self, embedding, agent):
+        self.stored.append((embedding, agent))
+
+
+def _route(history):
+    async def run():
+        agent = await agents._route({"messages": history})
+        # Let the cancelled router call and the background cache write finish
+        await asyncio.sleep(0)
+        return agent
+    return asyncio.run(run())
+
+
+def test_route_cache_hit_cancels_the_router_call(monkeypatch):
+    cancelled = []
+
+    async def slow_router(prompt):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(prompt)
+            raise
+        return "Triage"
+
+    async def hit(history_text):
+        # The router call is already in flight while the cache is read
+        await asyncio.sleep(0)
+        return "Medical", [1.0]
+
+    monkeypatch.setattr(agents, "_ask_router", slow_router)
+    monkeypatch.setattr(agents, "_cached_route", hit)
+    assert _route([HumanMessage(content="what causes frostbite")]) == "Medical"
+    assert cancelled
+
+
+def test_route_cache_miss_stores_the_router_answer_by_window(monkeypatch):
+    windows = []
+    cache = _FakeCache()
+
+    async def router(prompt):
+        return "Logistics"
+
+    async def miss(history_text):
+        windows.append(history_text)
+        return None, [1.0]
+
+    monkeypatch.setattr(agents, "_ask_router", router)
+    monkeypatch.setattr(agents, "_cached_route", miss)
+    monkeypatch.setattr(agents, "router_cache", cache)
+    history = [
+        HumanMessage(content="There was a flood"),
+        AIMessage(content="Do you need supplies?"),
+        HumanMessage(content="yes"),
+    ]
+    assert _route(history) == "Logistics"
+    assert windows == ["User: There was a flood\nAI: Do you need supplies?\nUser: yes\n"]
+    assert cache.stored == [([1.0], "Logistics")]
+
+
+# --- Combined answer parsing ---
+
+def test_combined_answer_picks_the_routed_specialist():
+    text = '{"route": "Medical", "Triage": "t", "Logistics": "l", "Medical": "m"}'
+    assert _parse_combined_answer(text) == "m"
+
+
+def test_combined_answer_ignores_surrounding_text():
+    text = 'Sure:\n```json\n{"route": "Logistics", "Logistics": "Sector 4 shelter"}\n```'
+    assert _parse_combined_answer(text) == "Sector 4 shelter"
+
+
+@pytest.mark.parametrize("route", ["FINISH", None, ["Medical"], {"a": 1}])
+def test_combined_answer_falls_back_to_triage(route):
+    answers = {"Triage": "t", "Medical": "m"}
+    if route is not None:
+        answers["route"] = route
+    assert _parse_combined_answer(json.dumps(answers)) == "t"
+
+
+@pytest.mark.parametrize("text", ["plain prose", "[1, 2]", '{"route": "Medical"}', '{"Medical": 3}'])
+def test_combined_answer_returns_unusable_text_as_is(text):
+    assert _parse_combined_answer(text) == text
+
+
+# --- History compaction ---
+
+class _FakeSummaryLLM:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("quota")
+        return AIMessage(content="earlier turns")
+
+
+def _chat(turns):
+    history = []
+    for i in range(turns):
+        history += [HumanMessage(content=f"q{i}"), AIMessage(content=f"a{i}")]
+    return history
+
+
+def test_compaction_folds_whole_turns(monkeypatch):
+    monkeypatch.setattr(agents, "summary_llm", _FakeSummaryLLM())
+    compacted = agents.compact_history(_chat(15))
+    assert compacted[0].content == "[Summary] earlier turns"
+    assert isinstance(compacted[1], HumanMessage)
+    assert [msg.content for msg in compacted[1:]] == ["q11", "a11", "q12", "a12", "q13", "a13", "q14", "a14"]
+
+
+def test_compaction_runs_at_most_once_every_10_turns(monkeypatch):
+    summary_llm = _FakeSummaryLLM()
+    monkeypatch.setattr(agents, "summary_llm", summary_llm)
+    context = []
+    compacted_at = []
+    for turn in range(60):
+        context += [HumanMessage(content=f"q{turn}"), AIMessage(content=f"a{turn}")]
+        before = len(summary_llm.prompts)
+        context = agents.compact_history(context)
+        if len(summary_llm.prompts) > before:
+            compacted_at.append(turn)
+            assert isinstance(context[1], HumanMessage)
+    gaps = [b - a for a, b in zip(compacted_at, compacted_at[1:])]
+    assert compacted_at and all(gap >= 10 for gap in gaps)
+
+
+def test_failed_compaction_still_caps_at_a_turn_boundary(monkeypatch):
+    monkeypatch.setattr(agents, "summary_llm", _FakeSummaryLLM(fail=True))
+    compacted = agents.compact_history([AIMessage(content="[Summary] x")] + _chat(15))
+    assert len(compacted) <= agents.HISTORY_MAX_MESSAGES
+    assert isinstance(compacted[0], HumanMessage)
+
+
+def test_short_history_is_left_alone(monkeypatch):
+    summary_llm = _FakeSummaryLLM()
+    monkeypatch.setattr(agents, "summary_llm", summary_llm)
+    history = [AIMessage(content="[Summary] x")] + _chat(4)
+    assert agents.compact_history(history) == history
+    assert not summary_llm.prompts
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
\ No newline at end of file
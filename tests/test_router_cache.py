@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import router_cache
+from router_cache import RouterCache
+
+
+def _lookup(cache, embedding):
+    return asyncio.run(cache.get_async(embedding))
+
+
+def _store(cache, embedding, agent):
+    asyncio.run(cache.put_async(embedding, agent))
+
+
+# --- Similarity threshold ---
+
+def test_similar_embedding_hits():
+    cache = RouterCache(threshold=0.9)
+    _store(cache, [1.0, 0.0, 0.0], "Logistics")
+    assert _lookup(cache, [0.95, 0.1, 0.0]) == "Logistics"
+
+
+def test_dissimilar_embedding_misses():
+    cache = RouterCache(threshold=0.9)
+    _store(cache, [1.0, 0.0, 0.0], "Logistics")
+    assert _lookup(cache, [0.5, 0.5, 0.0]) is None
+
+
+def test_empty_cache_misses():
+    assert _lookup(RouterCache(), [1.0, 0.0]) is None
+
+
+def test_closest_entry_wins():
+    cache = RouterCache(threshold=0.5)
+    _store(cache, [1.0, 0.0], "Triage")
+    _store(cache, [0.0, 1.0], "Medical")
+    assert _lookup(cache, [0.2, 0.9]) == "Medical"
+
+
+# --- Expiry and size ---
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(router_cache.time, "time", lambda: now[0])
+    cache = RouterCache(ttl=60)
+    _store(cache, [1.0, 0.0], "Triage")
+    now[0] += 59
+    assert _lookup(cache, [1.0, 0.0]) == "Triage"
+    now[0] += 1
+    assert _lookup(cache, [1.0, 0.0]) is None
+
+
+def test_oldest_entry_is_dropped_past_max_entries(monkeypatch):
+    monkeypatch.setattr(router_cache, "MAX_ENTRIES", 2)
+    cache = RouterCache(threshold=0.99)
+    _store(cache, [1.0, 0.0, 0.0], "Triage")
+    _store(cache, [0.0, 1.0, 0.0], "Logistics")
+    _store(cache, [0.0, 0.0, 1.0], "Medical")
+    assert len(cache._agents) == 2
+    assert _lookup(cache, [1.0, 0.0, 0.0]) is None
+    assert _lookup(cache, [0.0, 0.0, 1.0]) == "Medical"
\ No newline at end of file
@@ -0,0 +1,65 @@
+import pytest
+
+import supervisor_rules
+from supervisor_rules import classify_by_rules
+
+
+# --- Closing phrases ---
+
+@pytest.mark.parametrize("text", ["thanks", "Thank you!", "  Bye.", "goodbye"])
+def test_whole_closing_phrase_finishes(text):
+    assert classify_by_rules(text) == "FINISH"
+
+
+@pytest.mark.parametrize("text", [
+    "Thanks. We are at 5th and Main, two people hurt",
+    "thank you, what are the symptoms of hypothermia?",
+    "bye the way, is anyone trapped?",
+])
+def test_closing_phrase_inside_a_request_does_not_finish(text):
+    assert classify_by_rules(text) != "FINISH"
+
+
+# --- Keyword labels ---
+
+@pytest.mark.parametrize("text, agent", [
+    ("My neighbour is BLEEDING badly", "Triage"),
+    ("where is the nearest shelter?", "Logistics"),
+    ("do you have blankets and water packs", "Logistics"),
+    ("what are the symptoms of dehydration", "Medical"),
+])
+def test_single_label_routes(text, agent):
+    assert classify_by_rules(text) == agent
+
+
+@pytest.mark.parametrize("text", [
+    "I'm bleeding, where is the shelter?",
+    "how to treat someone who is trapped",
+])
+def test_conflicting_labels_fall_through(text):
+    assert classify_by_rules(text) is None
+
+
+@pytest.mark.parametrize("text", ["", "hello", "sheltered", "unbitten"])
+def test_no_whole_keyword_falls_through(text):
+    assert classify_by_rules(text) is None
+
+
+# --- Engines ---
+
+ENGINE_SAMPLES = [
+    "i'm bleeding, where is the shelter?",
+    "shelters near sector 4",
+    "first aid kits and blankets",
+    "what causes the side effects of this dosage",
+    "sheltered from the storm",
+    "nothing to see here",
+]
+
+
+@pytest.mark.parametrize("engine", ["re2", "hyperscan"])
+def test_optional_engines_match_stdlib(engine):
+    pytest.importorskip(engine)
+    matcher = supervisor_rules._MATCHERS[engine]
+    for text in ENGINE_SAMPLES:
+        assert matcher(text) == supervisor_rules._MATCHERS["re"](text), text
\ No newline at end of file
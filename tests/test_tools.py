@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+import tools
+
+
+class _FakeSearch:
+    def __init__(self):
+        self.queries = []
+
+    def run(self, query):
+        self.queries.append(query)
+        return f"result {len(self.queries)}"
+
+
+def _search(args):
+    return asyncio.run(tools.search_shelters.ainvoke(args))
+
+
+@pytest.fixture
+def search(monkeypatch):
+    fake = _FakeSearch()
+    monkeypatch.setattr(tools, "_get_search", lambda: fake)
+    tools._search_shelters_cached.cache_clear()
+    yield fake
+    tools._search_shelters_cached.cache_clear()
+
+
+def test_shelter_search_is_cached_per_location_within_the_hour(search, monkeypatch):
+    monkeypatch.setattr(tools.time, "time", lambda: 7200.0)
+    first = _search({"location": "Sector 4"})
+    assert _search({"location": " sector 4 "}) == first
+    assert len(search.queries) == 1
+
+
+def test_shelter_search_expires_with_the_hour(search, monkeypatch):
+    now = [7200.0]
+    monkeypatch.setattr(tools.time, "time", lambda: now[0])
+    _search({"location": "Sector 4"})
+    now[0] += tools.SHELTER_CACHE_SECONDS
+    _search({"location": "Sector 4"})
+    assert len(search.queries) == 2
\ No newline at end of file
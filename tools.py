@@ -1,11 +1,26 @@
+import asyncio
 import sqlite3
-import pandas as pd
+import threading
+import time
+from functools import lru_cache
 from langchain_core.tools import tool
-from langchain_community.tools import DuckDuckGoSearchRun
+
+DB_PATH = 'resq_link.db'
+
+# One shared autocommit connection instead of reconnecting per tool call,
+# opened on first use so importing this module stays cheap.
+# sqlite3 keeps prepared statements in its per-connection statement cache.
+_CONN = None
+
+# Tools may run from worker threads, so serialize access to the connection
+_LOCK = threading.Lock()
+
+INSERT_INCIDENT_SQL = "INSERT INTO incidents (severity, location, needs, status) VALUES (?, ?, ?, 'OPEN')"
+SELECT_INVENTORY_SQL = "SELECT item, quantity, location FROM inventory WHERE item LIKE ?"
+INVENTORY_TABLE_HEADER = "| item | quantity | location |\n|---|---|---|\n"
 
 # Initialize a mock database for disaster resources
-def init_db():
-    conn = sqlite3.connect('resq_link.db')
+def init_db(conn):
     c = conn.cursor()
     
     # Create tables
@@ -19,47 +34,65 @@ def init_db():
     # Seed data (INSERT OR IGNORE now works because of the PRIMARY KEY)
     c.execute("INSERT OR IGNORE INTO inventory (item, quantity, location) VALUES ('Water Packs', 50, 'Shelter A')")
     c.execute("INSERT OR IGNORE INTO inventory (item, quantity, location) VALUES ('First Aid Kits', 20, 'Shelter B')")
-    
-    conn.commit()
-    conn.close()
 
-# Run initialization
-init_db()
+def _get_conn():
+    """Returns the shared connection, opening and initializing it once per process.
+
+    Callers must hold _LOCK.
+    """
+    global _CONN
+    if _CONN is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;")
+        init_db(conn)
+        _CONN = conn
+    return _CONN
 
 @tool
 def log_incident(severity: str, location: str, needs: str):
     """Logs a new incident into the central database. Use this when a user reports an emergency."""
-    conn = sqlite3.connect('resq_link.db')
-    c = conn.cursor()
-    c.execute("INSERT INTO incidents (severity, location, needs, status) VALUES (?, ?, ?, 'OPEN')", 
-              (severity, location, needs))
-    conn.commit()
-    incident_id = c.lastrowid
-    conn.close()
+    with _LOCK:
+        incident_id = _get_conn().execute(INSERT_INCIDENT_SQL, (severity, location, needs)).lastrowid
     return f"Incident logged successfully. ID: {incident_id}. Dispatching protocols initiated."
 
 @tool
 def check_inventory(item_query: str):
     """Checks available relief supplies in the database."""
-    conn = sqlite3.connect('resq_link.db')
     # Use parameterized query for safety
-    query = "SELECT * FROM inventory WHERE item LIKE ?"
-    params = (f'%{item_query}%',)
-    
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
+    with _LOCK:
+        rows = _get_conn().execute(SELECT_INVENTORY_SQL, (f'%{item_query}%',)).fetchall()
     
-    if df.empty:
+    if not rows:
         return "No specific inventory found matching that request."
     
     # Returns a markdown table string
-    return df.to_markdown(index=False)
+    return INVENTORY_TABLE_HEADER + "\n".join(f"| {r[0]} | {r[1]} | {r[2]} |" for r in rows)
+
+# Reused across calls so the search client is only built once. Created on
+# first search: langchain_community is slow to import.
+_SEARCH = None
+
+def _get_search():
+    global _SEARCH
+    if _SEARCH is None:
+        from langchain_community.tools import DuckDuckGoSearchRun
+        _SEARCH = DuckDuckGoSearchRun()
+    return _SEARCH
+
+# Shelters open and fill up, so cached results only live for the current hour
+SHELTER_CACHE_SECONDS = 60 * 60
+
+@lru_cache(maxsize=256)
+def _search_shelters_cached(location_key: str, time_bucket: int):
+    """Runs the shelter search, memoized per normalized location and time bucket."""
+    return _get_search().run(f"emergency shelters near {location_key} disaster relief")
 
 @tool
-def search_shelters(location: str):
+async def search_shelters(location: str):
     """Uses internet search to find emergency shelters near a location."""
-    search = DuckDuckGoSearchRun()
-    return search.run(f"emergency shelters near {location} disaster relief")
+    time_bucket = int(time.time() // SHELTER_CACHE_SECONDS)
+    # The search client is blocking, so keep it off the event loop
+    return await asyncio.to_thread(_search_shelters_cached, location.strip().lower(), time_bucket)
 
 # Export toolkit list
 triage_tools = [log_incident]